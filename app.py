@@ -1,9 +1,21 @@
 import streamlit as st
 import pandas as pd
 import io
+import re
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from ssh_checker import SSHConnectivityChecker
+import itertools
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from ssh_checker import (
+    RESULT_CACHE_TTL, SSHConnectivityChecker, close_all_sessions, credential_digest, resolve_host
+)
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pv
+except ImportError:
+    # pyarrow normally ships with Streamlit; fall back to pandas parsing without it
+    pa = pv = None
 
 # Configure page
 st.set_page_config(
@@ -12,72 +24,200 @@ st.set_page_config(
     layout="wide"
 )
 
+# Default number of probes in flight at once (adjustable in the sidebar)
+DEFAULT_CONCURRENT_PROBES = 128
+
+# Number of threads used to resolve hostnames before probing
+DNS_WORKERS = 64
+
+# Refresh the intermediate results table every N completions or every N seconds
+RENDER_EVERY = 25
+RENDER_INTERVAL = 0.5
+
+# CSV uploads larger than this are read in chunks of CSV_CHUNK_ROWS rows
+LARGE_CSV_BYTES = 50 * 1024 * 1024
+CSV_CHUNK_ROWS = 100_000
+
+# Cells treated as missing, matching pandas' default NA values
+CSV_NULL_VALUES = [
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+]
+
+# Result columns, stored as parallel lists indexed by server position
+RESULT_COLUMNS = ['server', 'status', 'response_time', 'error']
+
+# Colour indicator shown in front of each status in the results table
+STATUS_ICONS = {
+    'Connected': '🟢',
+    'Failed': '🔴',
+    'Timeout': '🟡',
+    'Pending': '⚪',
+}
+DEFAULT_STATUS_ICON = '🔴'
+
+# Characters allowed in a hostname or IPv4/IPv6 address
+VALID_SERVER = re.compile(r'^[A-Za-z0-9._:-]+$')
+
 # Initialize session state
 if 'results' not in st.session_state:
-    st.session_state.results = []
+    st.session_state.results = {}
 if 'checking' not in st.session_state:
     st.session_state.checking = False
 
 def reset_results():
     """Reset results and checking state"""
-    st.session_state.results = []
+    st.session_state.results = {}
     st.session_state.checking = False
 
-def check_ssh_connectivity(servers, username="", password="", port=22, timeout=10):
-    """Check SSH connectivity for multiple servers with progress tracking"""
+def unique_servers(servers):
+    """Normalise server names and drop blanks and duplicates, keeping input order"""
+    return list(dict.fromkeys(server.strip().lower() for server in servers if server.strip()))
+
+# Evicted checkers close their own pooled sessions once they sit idle for POOL_IDLE_TTL
+@st.cache_resource(show_spinner=False, max_entries=8, ttl=600)
+def get_checker(username, port, timeout, connect_timeout):
+    """Return the checker shared across reruns and sessions for these settings"""
+    # The password is supplied per check so it never becomes part of the cache key
+    return SSHConnectivityChecker(username, "", port, timeout, connect_timeout)
+
+@st.cache_data(ttl=RESULT_CACHE_TTL, show_spinner=False)
+def cached_check(server, port, username, timeout, connect_timeout, password_digest, _password="", _addresses=None):
+    """Check a single server, reusing results from the last RESULT_CACHE_TTL seconds"""
+    # _password is excluded from the cache key so the secret is never hashed; password_digest
+    # keeps results for different (or missing) passwords apart.
+    # _addresses is derived from server so it does not need to be part of the key
+    checker = get_checker(username, port, timeout, connect_timeout)
+    return checker.check_connectivity(server, password=_password, addresses=_addresses)
+
+def resolve_servers(servers, port):
+    """
+    Resolve all servers concurrently
+    
+    Returns a ({server: addresses}, {server: error}) tuple of resolved addresses and
+    resolution failures.
+    """
+    addresses = {}
+    errors = {}
+    with ThreadPoolExecutor(max_workers=min(DNS_WORKERS, len(servers))) as executor:
+        future_to_server = {
+            executor.submit(resolve_host, server, port): server
+            for server in servers
+        }
+        for future, server in future_to_server.items():
+            try:
+                addresses[server] = future.result()
+            except Exception as e:
+                errors[server] = e
+    return addresses, errors
+
+def _probe(index, server, addresses, username, password, port, timeout, connect_timeout):
+    """Run a cached single-server check, tagged with its result index"""
+    try:
+        result = cached_check(
+            server, port, username, timeout, connect_timeout,
+            credential_digest(password), password, addresses
+        )
+    except Exception as e:
+        # Handle individual server check failures
+        result = {
+            'server': server,
+            'status': 'Error',
+            'response_time': 'N/A',
+            'error': str(e)
+        }
+    return index, result
+
+def check_ssh_connectivity(servers, username="", password="", port=22, timeout=10,
+                           connect_timeout=3, max_concurrency=DEFAULT_CONCURRENT_PROBES):
+    """
+    Check SSH connectivity for multiple servers with progress tracking
+    
+    Returns a dict mapping each of RESULT_COLUMNS to a list with one entry per server.
+    """
+    servers = unique_servers(servers)
     if not servers:
-        return []
+        return {}
     
-    checker = SSHConnectivityChecker(username, password, port, timeout)
-    results = []
+    # Fill columns in place by index instead of building a dict per server
+    total = len(servers)
+    results = {
+        'server': list(servers),
+        'status': ['Pending'] * total,
+        'response_time': ['N/A'] * total,
+        'error': [''] * total
+    }
+    
+    # Malformed names would only fail slowly in DNS, so report them without probing
+    to_resolve = []
+    for i, server in enumerate(servers):
+        if VALID_SERVER.match(server):
+            to_resolve.append(i)
+        else:
+            results['status'][i] = 'Invalid'
+            results['error'][i] = 'Invalid server name'
+    if not to_resolve:
+        return results
     
     # Create progress containers
     progress_bar = st.progress(0)
     status_text = st.empty()
-    results_container = st.container()
+    results_placeholder = st.empty()
     
-    total_servers = len(servers)
-    completed = 0
+    # Resolve every hostname up front so probes only wait on TCP and SSH
+    status_text.text(f"Resolving {len(to_resolve)} hostnames...")
+    addresses, dns_errors = resolve_servers([servers[i] for i in to_resolve], port)
+    to_probe = []
+    for i in to_resolve:
+        if servers[i] in dns_errors:
+            results['status'][i] = 'Failed'
+            results['error'][i] = f'DNS resolution failed: {str(dns_errors[servers[i]])}'
+        else:
+            to_probe.append(i)
     
-    # Use ThreadPoolExecutor for parallel processing
-    with ThreadPoolExecutor(max_workers=min(10, total_servers)) as executor:
-        # Submit all tasks
-        future_to_server = {
-            executor.submit(checker.check_connectivity, server): server 
-            for server in servers
-        }
-        
-        # Process completed tasks
-        for future in as_completed(future_to_server):
-            server = future_to_server[future]
-            try:
-                result = future.result()
-                results.append(result)
-                completed += 1
+    total_servers = len(to_probe)
+    
+    if to_probe:
+        last_render = time.monotonic()
+        rendered = 0
+        completed = 0
+        max_workers = min(max_concurrency, total_servers)
+        # The pool size caps open sockets; cache hits return without touching the network
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            queue = iter(to_probe)
+            inflight = set()
+            while True:
+                # Top up from the queue so at most two probes per worker are scheduled
+                for i in itertools.islice(queue, 2 * max_workers - len(inflight)):
+                    inflight.add(executor.submit(
+                        _probe, i, servers[i], addresses[servers[i]], username, password,
+                        port, timeout, connect_timeout
+                    ))
+                if not inflight:
+                    break
+                
+                done, inflight = wait(inflight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i, result = future.result()
+                    results['status'][i] = result['status']
+                    results['response_time'][i] = result['response_time']
+                    results['error'][i] = result['error']
+                completed += len(done)
                 
                 # Update progress
                 progress = completed / total_servers
                 progress_bar.progress(progress)
                 status_text.text(f"Checking connectivity... {completed}/{total_servers} completed")
                 
-                # Display intermediate results
-                with results_container:
-                    display_results(results)
-                
-            except Exception as e:
-                # Handle individual server check failures
-                error_result = {
-                    'server': server,
-                    'status': 'Error',
-                    'response_time': 'N/A',
-                    'error': str(e)
-                }
-                results.append(error_result)
-                completed += 1
-                
-                progress = completed / total_servers
-                progress_bar.progress(progress)
-                status_text.text(f"Checking connectivity... {completed}/{total_servers} completed")
+                # Re-rendering the table is costly, so only refresh it periodically
+                if (completed - rendered >= RENDER_EVERY
+                        or time.monotonic() - last_render > RENDER_INTERVAL
+                        or completed == total_servers):
+                    # Replace the previous table rather than stacking a new one
+                    with results_placeholder.container():
+                        display_results(results)
+                    last_render = time.monotonic()
+                    rendered = completed
     
     # Clear progress indicators
     progress_bar.empty()
@@ -85,69 +225,141 @@ def check_ssh_connectivity(servers, username="", password="", port=22, timeout=1
     
     return results
 
+def status_label(status):
+    """Prefix a status with its colour indicator"""
+    return f"{STATUS_ICONS.get(status, DEFAULT_STATUS_ICON)} {status}"
+
 def display_results(results):
     """Display results in a formatted table"""
     if not results:
         return
     
-    df = pd.DataFrame(results)
+    # Build straight from the column lists; no per-row dicts to walk
+    df = pd.DataFrame(results, columns=RESULT_COLUMNS)
+    
+    # Colour-code status as plain text so the table renders client-side without a Styler
+    df['status'] = df['status'].map(status_label)
+    
+    st.dataframe(
+        df,
+        use_container_width=True,
+        column_config={
+            'server': st.column_config.TextColumn("Server"),
+            'status': st.column_config.TextColumn("Status"),
+            'response_time': st.column_config.TextColumn("Response Time"),
+            'error': st.column_config.TextColumn("Error"),
+        }
+    )
+
+def find_server_column(columns):
+    """
+    Pick the CSV column holding server names
+    
+    Returns a (server_column, fallback_column) tuple; fallback_column is set when
+    no standard column name matched and the first column is used instead.
+    """
+    # Try to find server column (common column names)
+    server_columns = ['server', 'hostname', 'fqdn', 'host', 'ip', 'address']
+    columns_by_name = {str(c).lower(): c for c in columns}
+    
+    for col in server_columns:
+        if col in columns_by_name:
+            return columns_by_name[col], None
+    
+    if len(columns) > 0:
+        # Use first column if no standard column found
+        return columns[0], columns[0]
+    
+    return None, None
+
+@st.cache_data(show_spinner=False)
+def parse_uploaded_file_cached(file_bytes, name):
+    """
+    Parse raw CSV or TXT file contents into a server list
     
-    # Apply color coding based on status
-    def style_status(val):
-        if val == 'Connected':
-            return 'background-color: #d4edda; color: #155724'
-        elif val == 'Failed':
-            return 'background-color: #f8d7da; color: #721c24'
-        elif val == 'Timeout':
-            return 'background-color: #fff3cd; color: #856404'
+    Returns a (servers, fallback_column) tuple, where fallback_column names the
+    CSV column used when no standard server column was found. Raises ValueError
+    when no server data can be extracted.
+    """
+    if name.endswith('.csv'):
+        buffer = io.BytesIO(file_bytes)
+        
+        # Read only the header first to pick the server column
+        header = pd.read_csv(buffer, nrows=0).columns
+        server_col, fallback_col = find_server_column(header)
+        
+        if server_col is None:
+            raise ValueError("Could not find server data in CSV file.")
+        
+        # Re-read just that column as text, skipping dtype inference for the rest
+        buffer.seek(0)
+        if pv is not None:
+            try:
+                # Arrow parses into a columnar buffer without a Python object per cell
+                table = pv.read_csv(
+                    buffer,
+                    read_options=pv.ReadOptions(block_size=1 << 20),
+                    convert_options=pv.ConvertOptions(
+                        include_columns=[server_col],
+                        column_types={server_col: pa.string()},
+                        null_values=CSV_NULL_VALUES,
+                        strings_can_be_null=True
+                    )
+                )
+            except pa.ArrowException:
+                # Arrow rejects ragged rows (e.g. a trailing comma) that pandas accepts, and
+                # names blank or duplicate headers differently, so the pandas name is unknown
+                buffer.seek(0)
+            else:
+                servers = [server for server in table.column(server_col).to_pylist() if server is not None]
+                return unique_servers(servers), fallback_col
+        
+        # index_col=False stops a trailing comma on every row from turning column one into the index
+        read_options = {
+            'usecols': [server_col],
+            'dtype': {server_col: 'string'},
+            'index_col': False,
+            'engine': 'c'
+        }
+        if len(file_bytes) > LARGE_CSV_BYTES:
+            servers = []
+            for chunk in pd.read_csv(buffer, chunksize=CSV_CHUNK_ROWS, **read_options):
+                servers.extend(chunk[server_col].dropna().tolist())
         else:
-            return 'background-color: #f8d7da; color: #721c24'
+            servers = pd.read_csv(buffer, **read_options)[server_col].dropna().tolist()
+        
+        return unique_servers(servers), fallback_col
     
-    # Style the dataframe
-    styled_df = df.style.map(style_status, subset=['status'])
+    elif name.endswith('.txt'):
+        # Read TXT file (one server per line)
+        content = file_bytes.decode('utf-8')
+        return unique_servers(content.split('\n')), None
     
-    st.dataframe(styled_df, use_container_width=True)
+    else:
+        raise ValueError("Unsupported file format. Please upload CSV or TXT files only.")
+
+@st.cache_data(show_spinner=False)
+def results_to_csv(results):
+    """Encode results as CSV bytes, reusing the encoding while results are unchanged"""
+    return pd.DataFrame(results, columns=RESULT_COLUMNS).to_csv(index=False).encode('utf-8')
 
 def parse_uploaded_file(uploaded_file):
     """Parse uploaded CSV or TXT file to extract server list"""
     try:
-        if uploaded_file.name.endswith('.csv'):
-            # Read CSV file
-            df = pd.read_csv(uploaded_file)
-            
-            # Try to find server column (common column names)
-            server_columns = ['server', 'hostname', 'fqdn', 'host', 'ip', 'address']
-            server_col = None
-            
-            for col in server_columns:
-                if col.lower() in [c.lower() for c in df.columns]:
-                    server_col = col
-                    break
-            
-            if server_col is None and len(df.columns) > 0:
-                # Use first column if no standard column found
-                server_col = df.columns[0]
-                st.warning(f"No standard server column found. Using '{server_col}' as server names.")
-            
-            if server_col:
-                servers = df[server_col].dropna().astype(str).tolist()
-                return [server.strip() for server in servers if server.strip()]
-            else:
-                st.error("Could not find server data in CSV file.")
-                return []
-                
-        elif uploaded_file.name.endswith('.txt'):
-            # Read TXT file (one server per line)
-            content = uploaded_file.read().decode('utf-8')
-            servers = [line.strip() for line in content.split('\n') if line.strip()]
-            return servers
-        else:
-            st.error("Unsupported file format. Please upload CSV or TXT files only.")
-            return []
-            
+        # Raw bytes and file name are hashable, so reruns reuse the parsed result
+        with st.spinner("Parsing…"):
+            servers, fallback_col = parse_uploaded_file_cached(uploaded_file.getvalue(), uploaded_file.name)
+    except ValueError as e:
+        st.error(str(e))
+        return []
     except Exception as e:
         st.error(f"Error parsing file: {str(e)}")
         return []
+    
+    if fallback_col is not None:
+        st.warning(f"No standard server column found. Using '{fallback_col}' as server names.")
+    
+    return servers
 
 def main():
     st.title("🔌 SSH Connectivity Dashboard")
@@ -158,7 +370,18 @@ def main():
     ssh_username = st.sidebar.text_input("Username (optional)", placeholder="ssh_user")
     ssh_password = st.sidebar.text_input("Password (optional)", type="password", placeholder="ssh_password")
     ssh_port = st.sidebar.number_input("SSH Port", min_value=1, max_value=65535, value=22)
-    ssh_timeout = st.sidebar.number_input("Timeout (seconds)", min_value=1, max_value=300, value=10)
+    ssh_timeout = st.sidebar.number_input("Timeout (seconds)", min_value=1, max_value=300, value=10,
+                                          help="How long to wait for the SSH banner")
+    ssh_connect_timeout = st.sidebar.number_input("Connect timeout (seconds)", min_value=1, max_value=60, value=3,
+                                                  help="How long to wait for the TCP connection and authentication")
+    max_concurrency = st.sidebar.slider("Max concurrent probes", 8, 512, DEFAULT_CONCURRENT_PROBES)
+    
+    st.sidebar.caption(f"Results are cached for {RESULT_CACHE_TTL} seconds per server")
+    if st.sidebar.button("Force refresh"):
+        cached_check.clear()
+        close_all_sessions()
+    if st.sidebar.button("Clear DNS cache"):
+        resolve_host.cache_clear()
     
     # Main interface tabs
     tab1, tab2 = st.tabs(["Manual Input", "File Upload"])
@@ -186,7 +409,7 @@ def main():
         if submit_manual and servers:
             st.session_state.checking = True
             st.session_state.results = check_ssh_connectivity(
-                servers, ssh_username, ssh_password, ssh_port, ssh_timeout
+                servers, ssh_username, ssh_password, ssh_port, ssh_timeout, ssh_connect_timeout, max_concurrency
             )
             st.session_state.checking = False
     
@@ -204,7 +427,7 @@ def main():
             
             **TXT Format:**
             - One server name/IP per line
-            - Empty lines will be ignored
+            - Empty lines and duplicate entries will be ignored
             
             **Example CSV:**
             ```
@@ -248,7 +471,7 @@ def main():
                     if st.button("Check All Servers", type="primary"):
                         st.session_state.checking = True
                         st.session_state.results = check_ssh_connectivity(
-                            servers, ssh_username, ssh_password, ssh_port, ssh_timeout
+                            servers, ssh_username, ssh_password, ssh_port, ssh_timeout, ssh_connect_timeout, max_concurrency
                         )
                         st.session_state.checking = False
                 
@@ -262,32 +485,30 @@ def main():
         st.header("📊 Connectivity Results")
         
         # Summary statistics
-        df = pd.DataFrame(st.session_state.results)
-        total = len(df)
-        connected = len(df[df['status'] == 'Connected'])
-        failed = len(df[df['status'] == 'Failed'])
-        timeout = len(df[df['status'] == 'Timeout'])
-        error = len(df[df['status'] == 'Error'])
+        status_counts = Counter(st.session_state.results['status'])
+        total = sum(status_counts.values())
+        connected = status_counts['Connected']
+        failed = status_counts['Failed']
+        timeout = status_counts['Timeout']
+        error = status_counts['Error']
+        invalid = status_counts['Invalid']
         
-        col1, col2, col3, col4, col5 = st.columns(5)
+        col1, col2, col3, col4, col5, col6 = st.columns(6)
         col1.metric("Total", total)
         col2.metric("Connected", connected, delta=f"{connected/total*100:.1f}%" if total > 0 else "0%")
         col3.metric("Failed", failed, delta=f"{failed/total*100:.1f}%" if total > 0 else "0%")
         col4.metric("Timeout", timeout, delta=f"{timeout/total*100:.1f}%" if total > 0 else "0%")
         col5.metric("Error", error, delta=f"{error/total*100:.1f}%" if total > 0 else "0%")
+        col6.metric("Invalid", invalid, delta=f"{invalid/total*100:.1f}%" if total > 0 else "0%")
         
         # Results table
         display_results(st.session_state.results)
         
         # Export functionality
         if st.button("📥 Export Results to CSV"):
-            csv_buffer = io.StringIO()
-            df.to_csv(csv_buffer, index=False)
-            csv_data = csv_buffer.getvalue()
-            
             st.download_button(
                 label="Download CSV",
-                data=csv_data,
+                data=results_to_csv(st.session_state.results),
                 file_name=f"ssh_connectivity_results_{int(time.time())}.csv",
                 mime="text/csv"
             )
@@ -1,12 +1,106 @@
+import hmac
 import paramiko
+import secrets
 import socket
+import threading
 import time
-from typing import Dict, Any
+import weakref
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Any, Callable, Optional, Sequence, Tuple
+
+# How long the dashboard reuses a server's last result before checking it again
+RESULT_CACHE_TTL = 60
+
+# Authenticated sessions kept open per checker, and how long an unused one survives.
+# A session is only reused once the cached result for its server has expired, so the
+# idle TTL must be well above RESULT_CACHE_TTL or sessions close before they are needed.
+POOL_MAX_SESSIONS = 64
+POOL_IDLE_TTL = 5 * RESULT_CACHE_TTL
+
+# Per-process key for credential_digest, so digests cannot be matched against a wordlist
+_DIGEST_KEY = secrets.token_bytes(32)
+
+# Every live checker, so their pooled sessions can all be closed at once
+_checkers = weakref.WeakSet()
+
+# The base policy accepts unknown host keys without storing them; one instance is
+# shared by every client instead of allocating an AutoAddPolicy per check
+_HOST_KEY_POLICY = paramiko.MissingHostKeyPolicy()
+
+# Each worker thread keeps a spare client that is reused after failed attempts
+_thread_local = threading.local()
+
+def _spare_client() -> paramiko.SSHClient:
+    """Return this thread's spare SSH client, creating it on first use"""
+    ssh = getattr(_thread_local, 'client', None)
+    if ssh is None:
+        ssh = paramiko.SSHClient()
+        ssh.set_missing_host_key_policy(_HOST_KEY_POLICY)
+        _thread_local.client = ssh
+    return ssh
+
+def credential_digest(password: str) -> str:
+    """
+    Return a non-secret stand-in for a password, usable as a cache or pool key
+    
+    Args:
+        password: SSH password (may be empty)
+        
+    Returns:
+        HMAC-SHA256 hex digest of the password under a per-process key, or an
+        empty string when there is none
+    """
+    if not password:
+        return ""
+    return hmac.new(_DIGEST_KEY, password.encode('utf-8'), 'sha256').hexdigest()
+
+@lru_cache(maxsize=4096)
+def resolve_host(host: str, port: int) -> Tuple[str, ...]:
+    """
+    Resolve a hostname to every address usable for a TCP connection
+    
+    Successful lookups are cached for the life of the process; call
+    resolve_host.cache_clear() to pick up DNS changes.
+    
+    Args:
+        host: Server hostname or IP address
+        port: Port the connection will be made to
+        
+    Returns:
+        Tuple of IP addresses in resolver order, without duplicates
+    """
+    infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    return tuple(dict.fromkeys(info[4][0] for info in infos))
+
+def _try_addresses(addresses: Sequence[str], attempt: Callable[[str], Any]) -> Any:
+    """
+    Call attempt with each address in turn until one succeeds
+    
+    Mirrors socket.create_connection: network errors move on to the next address,
+    and the last one is raised if every address fails. An empty sequence raises
+    socket.gaierror, the same error as a failed lookup.
+    """
+    if not addresses:
+        raise socket.gaierror(socket.EAI_NONAME, "No addresses to connect to")
+    last_error = None
+    for address in addresses:
+        try:
+            return attempt(address)
+        except OSError as e:
+            last_error = e
+    raise last_error
+
+def close_all_sessions() -> None:
+    """Close the pooled SSH sessions of every checker in this process"""
+    for checker in list(_checkers):
+        checker.close_all()
 
 class SSHConnectivityChecker:
     """SSH connectivity checker class"""
     
-    def __init__(self, username: str = "", password: str = "", port: int = 22, timeout: int = 10):
+    def __init__(self, username: str = "", password: str = "", port: int = 22, timeout: int = 10,
+                 connect_timeout: int = 3):
         """
         Initialize SSH connectivity checker
         
@@ -14,23 +108,136 @@ class SSHConnectivityChecker:
             username: SSH username (optional)
             password: SSH password (optional)
             port: SSH port (default: 22)
-            timeout: Connection timeout in seconds (default: 10)
+            timeout: SSH banner timeout in seconds (default: 10)
+            connect_timeout: TCP connect and authentication timeout in seconds (default: 3)
         """
         self.username = username
         self.password = password
         self.port = port
         self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        
+        # Authenticated sessions kept open for reuse, keyed by (server, password digest)
+        # and ordered least recently used first; values are (client, last used time)
+        self._pool: "OrderedDict[Tuple[str, str], Tuple[paramiko.SSHClient, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._reaper: Optional[threading.Timer] = None
+        _checkers.add(self)
+    
+    @staticmethod
+    def _is_alive(ssh: paramiko.SSHClient) -> bool:
+        """Cheaply check whether a pooled SSH session is still usable"""
+        transport = ssh.get_transport()
+        if transport is None or not transport.is_active():
+            return False
+        try:
+            transport.send_ignore()
+            return True
+        except Exception:
+            return False
+    
+    @staticmethod
+    def _close_quietly(clients) -> None:
+        """Close SSH clients, ignoring errors from already-dead sessions"""
+        for ssh in clients:
+            try:
+                ssh.close()
+            except Exception:
+                pass
+    
+    def _checkout(self, pool_key: Tuple[str, str]) -> Optional[paramiko.SSHClient]:
+        """Return the pooled session for a key, marking it most recently used"""
+        with self._lock:
+            entry = self._pool.get(pool_key)
+            if entry is None:
+                return None
+            self._pool[pool_key] = (entry[0], time.monotonic())
+            self._pool.move_to_end(pool_key)
+            return entry[0]
     
-    def check_connectivity(self, server: str) -> Dict[str, Any]:
+    def _checkin(self, pool_key: Tuple[str, str], ssh: paramiko.SSHClient) -> None:
+        """Add a freshly connected session, evicting the least recently used beyond the limit"""
+        evicted = []
+        with self._lock:
+            stale = self._pool.pop(pool_key, None)
+            if stale is not None:
+                evicted.append(stale[0])
+            self._pool[pool_key] = (ssh, time.monotonic())
+            while len(self._pool) > POOL_MAX_SESSIONS:
+                evicted.append(self._pool.popitem(last=False)[1][0])
+            self._schedule_reaper()
+        self._close_quietly(evicted)
+    
+    def _evict(self, pool_key: Tuple[str, str], ssh: paramiko.SSHClient) -> None:
+        """Remove a dead session from the pool and close it"""
+        with self._lock:
+            entry = self._pool.get(pool_key)
+            if entry is not None and entry[0] is ssh:
+                del self._pool[pool_key]
+        self._close_quietly([ssh])
+    
+    def _schedule_reaper(self) -> None:
+        """Start the idle-session timer if it is not already pending (caller holds the lock)"""
+        if self._reaper is None and self._pool:
+            self._reaper = threading.Timer(POOL_IDLE_TTL, self._reap_idle)
+            self._reaper.daemon = True
+            self._reaper.start()
+    
+    def _reap_idle(self) -> None:
+        """Close sessions unused for POOL_IDLE_TTL seconds, rescheduling while any remain"""
+        cutoff = time.monotonic() - POOL_IDLE_TTL
+        with self._lock:
+            expired = [key for key, (_, last_used) in self._pool.items() if last_used <= cutoff]
+            idle = [self._pool.pop(key)[0] for key in expired]
+            self._reaper = None
+            self._schedule_reaper()
+        self._close_quietly(idle)
+    
+    def close_all(self) -> None:
+        """Close every pooled SSH session"""
+        with self._lock:
+            clients = [ssh for ssh, _ in self._pool.values()]
+            self._pool.clear()
+            if self._reaper is not None:
+                self._reaper.cancel()
+                self._reaper = None
+        self._close_quietly(clients)
+    
+    def _probe_banner(self, addresses: Sequence[str]) -> bytes:
+        """
+        Open a plain TCP connection and read the SSH identification banner
+        
+        Args:
+            addresses: Resolved IP addresses of the server, tried in order
+            
+        Returns:
+            Raw banner bytes (empty if the server closed the connection)
+        """
+        # Dead hosts fail on the short connect timeout; slow daemons get the full banner timeout
+        sock = _try_addresses(
+            addresses,
+            lambda address: socket.create_connection((address, self.port), timeout=self.connect_timeout)
+        )
+        with sock:
+            sock.settimeout(self.timeout)
+            return sock.recv(256)
+    
+    def check_connectivity(self, server: str, password: Optional[str] = None,
+                           addresses: Optional[Sequence[str]] = None) -> Dict[str, Any]:
         """
         Check SSH connectivity to a single server
         
         Args:
             server: Server hostname or IP address
+            password: SSH password for this check (default: the checker's password)
+            addresses: Pre-resolved IP addresses to try in order (default: resolve server via resolve_host)
             
         Returns:
             Dictionary containing connectivity results
         """
+        if password is None:
+            password = self.password
+        
         start_time = time.time()
         result = {
             'server': server,
@@ -39,42 +246,59 @@ class SSHConnectivityChecker:
             'error': ''
         }
         
+        ssh = None
         try:
-            # Create SSH client
-            ssh = paramiko.SSHClient()
-            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            if addresses is None:
+                addresses = resolve_host(server, self.port)
             
-            # Attempt connection
-            if self.username and self.password:
+            if self.username and password:
+                pool_key = (server, credential_digest(password))
+                pooled = self._checkout(pool_key)
+                
+                if pooled is not None and self._is_alive(pooled):
+                    # Reuse the open session instead of a new handshake
+                    response_time = round((time.time() - start_time) * 1000, 2)
+                    result.update({
+                        'status': 'Connected',
+                        'response_time': f"{response_time} ms"
+                    })
+                    return result
+                
+                if pooled is not None:
+                    # Evict the dead session before reconnecting
+                    self._evict(pool_key, pooled)
+                
+                ssh = _spare_client()
+                
                 # Use provided credentials
-                ssh.connect(
-                    hostname=server,
+                _try_addresses(addresses, lambda address: ssh.connect(
+                    hostname=address,
                     port=self.port,
                     username=self.username,
-                    password=self.password,
-                    timeout=self.timeout,
-                    banner_timeout=self.timeout
-                )
+                    password=password,
+                    timeout=self.connect_timeout,
+                    banner_timeout=self.timeout,
+                    auth_timeout=self.connect_timeout,
+                    # Only try the supplied password, not agent or ~/.ssh keys first
+                    look_for_keys=False,
+                    allow_agent=False
+                ))
+                
+                # Hand the session over to the pool; this thread needs a new spare
+                self._checkin(pool_key, ssh)
+                _thread_local.client = None
+                ssh = None
             else:
-                # Try connection without authentication (just to test connectivity)
-                try:
-                    ssh.connect(
-                        hostname=server,
-                        port=self.port,
-                        timeout=self.timeout,
-                        banner_timeout=self.timeout,
-                        look_for_keys=False,
-                        allow_agent=False
-                    )
-                except paramiko.AuthenticationException:
-                    # Authentication failed, but connection was successful
-                    pass
-                except paramiko.SSHException as e:
-                    if "No authentication methods available" in str(e):
-                        # Server is reachable but requires auth
-                        pass
-                    else:
-                        raise e
+                # No credentials: reading the SSH banner is enough to prove the service is up
+                banner = self._probe_banner(addresses)
+                if not banner.startswith(b"SSH-"):
+                    response_time = round((time.time() - start_time) * 1000, 2)
+                    result.update({
+                        'status': 'Failed',
+                        'response_time': f"{response_time} ms",
+                        'error': f'No SSH banner received on port {self.port}'
+                    })
+                    return result
             
             # Calculate response time
             response_time = round((time.time() - start_time) * 1000, 2)
@@ -88,7 +312,7 @@ class SSHConnectivityChecker:
             result.update({
                 'status': 'Timeout',
                 'response_time': f"{response_time} ms",
-                'error': f'Connection timeout after {self.timeout} seconds'
+                'error': f'Connection timeout (connect {self.connect_timeout}s, banner {self.timeout}s)'
             })
             
         except socket.gaierror as e:
@@ -117,19 +341,12 @@ class SSHConnectivityChecker:
             
         except paramiko.SSHException as e:
             response_time = round((time.time() - start_time) * 1000, 2)
-            if "No authentication methods available" in str(e):
-                result.update({
-                    'status': 'Connected',
-                    'response_time': f"{response_time} ms",
-                    'error': 'SSH service running (no auth methods configured)'
-                })
-            else:
-                result.update({
-                    'status': 'Failed',
-                    'response_time': f"{response_time} ms",
-                    'error': f'SSH error: {str(e)}'
-                })
-                
+            result.update({
+                'status': 'Failed',
+                'response_time': f"{response_time} ms",
+                'error': f'SSH error: {str(e)}'
+            })
+            
         except Exception as e:
             response_time = round((time.time() - start_time) * 1000, 2)
             result.update({
@@ -140,7 +357,7 @@ class SSHConnectivityChecker:
             
         finally:
             try:
-                if 'ssh' in locals():
+                if ssh is not None:
                     ssh.close()
             except:
                 pass